@@ -15,34 +15,24 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from scipy.stats import fisher_exact, chi2_contingency
+from statsmodels.stats.proportion import proportion_confint
 
 from utils import (
-    load_kaggle, setup_plotting, save_fig, add_stat,
+    load_kaggle, setup_plotting, save_fig, add_stat, SIDE_DTYPE,
     KEEPER_BLUE, STRIKER_RED, FIELD_GREEN, WARN_AMBER, MUTED_GREY, PALETTE,
 )
 
 
-def _wilson_ci(k, n, z=1.96):
-    """Wilson score interval for a binomial proportion."""
-    if n == 0:
-        return 0.0, 0.0, 0.0
-    p = k / n
-    denom = 1 + z**2 / n
-    centre = (p + z**2 / (2 * n)) / denom
-    margin = z * np.sqrt((p * (1 - p) + z**2 / (4 * n)) / n) / denom
-    return p, max(0, centre - margin), min(1, centre + margin)
-
-
-def classify_mismatch(row):
+def classify_mismatch(df):
     """Classify each penalty into match type based on kicker/goalie sides."""
-    ks, gs = row["Kicker_Side"], row["Goalie_Side"]
-    if ks == gs:
-        return "Match"
+    ks = df["Kicker_Side"].to_numpy()
+    gs = df["Goalie_Side"].to_numpy()
+    match = ks == gs
     # Within-axis: both on horizontal (L↔R)
-    if {ks, gs} == {"L", "R"}:
-        return "Within-axis\nmismatch"
+    within = ((ks == "L") & (gs == "R")) | ((ks == "R") & (gs == "L"))
     # Cross-axis: one is C, other is L or R
-    return "Cross-axis\nmismatch"
+    return np.select([match, within], ["Match", "Within-axis\nmismatch"],
+                     default="Cross-axis\nmismatch")
 
 
 def run():
@@ -56,35 +46,32 @@ def run():
     # ------------------------------------------------------------------
     # 1. Classify each penalty
     # ------------------------------------------------------------------
-    df["mismatch"] = df.apply(classify_mismatch, axis=1)
-    counts = df.groupby("mismatch")["Outcome"].agg(["sum", "count"])
+    df["mismatch"] = pd.Categorical(classify_mismatch(df))
+    counts = df.groupby("mismatch", observed=True)["Outcome"].agg(["sum", "count"])
     counts.columns = ["goals", "total"]
     counts["saves"] = counts["total"] - counts["goals"]
     counts["conversion"] = counts["goals"] / counts["total"]
+    overall_mean = counts["goals"].sum() / counts["total"].sum()
     print("\nConversion rates by mismatch type:")
     print(counts.to_string())
 
     # ------------------------------------------------------------------
     # 2. Statistical test: within-axis vs cross-axis mismatch
     # ------------------------------------------------------------------
-    within = df[df["mismatch"] == "Within-axis\nmismatch"]
-    cross = df[df["mismatch"] == "Cross-axis\nmismatch"]
-    match = df[df["mismatch"] == "Match"]
-
-    # 2×2 table: rows = {within, cross}, cols = {goal, save/miss}
-    table = np.array([
-        [within["Outcome"].sum(), len(within) - within["Outcome"].sum()],
-        [cross["Outcome"].sum(), len(cross) - cross["Outcome"].sum()],
-    ])
+    within_label = "Within-axis\nmismatch"
+    cross_label = "Cross-axis\nmismatch"
+
+    # 3×2 table: rows = {match, within, cross}, cols = {goal, save/miss}
+    arr = counts.loc[["Match", within_label, cross_label], ["goals", "total"]].to_numpy()
+    table_3 = np.column_stack([arr[:, 0], arr[:, 1] - arr[:, 0]])
+    t_m, t_w, t_c = arr[:, 1]
+
+    # 2×2 slice: rows = {within, cross}
+    table = table_3[1:]
     odds_ratio, p_fisher = fisher_exact(table, alternative="greater")
     print(f"\nFisher exact (within > cross conversion): OR={odds_ratio:.3f}, p={p_fisher:.4f}")
 
     # Also chi-squared for the full 3-group comparison
-    table_3 = np.array([
-        [match["Outcome"].sum(), len(match) - match["Outcome"].sum()],
-        [within["Outcome"].sum(), len(within) - within["Outcome"].sum()],
-        [cross["Outcome"].sum(), len(cross) - cross["Outcome"].sum()],
-    ])
     chi2, p_chi2, dof, _ = chi2_contingency(table_3)
     print(f"Chi-squared (3 groups): χ²={chi2:.2f}, df={dof}, p={p_chi2:.4f}")
 
@@ -93,12 +80,10 @@ def run():
     # ------------------------------------------------------------------
     n_total = len(df)
     add_stat("PredOneNTotal", str(n_total))
-    add_stat("PredOneNWithin", str(len(within)))
-    add_stat("PredOneNCross", str(len(cross)))
-    add_stat("PredOneNMatch", str(len(match)))
+    add_stat("PredOneNWithin", str(t_w))
+    add_stat("PredOneNCross", str(t_c))
+    add_stat("PredOneNMatch", str(t_m))
 
-    within_label = "Within-axis\nmismatch"
-    cross_label = "Cross-axis\nmismatch"
     add_stat("PredOneConvWithin", f"{counts.loc[within_label, 'conversion']:.1%}")
     add_stat("PredOneConvCross", f"{counts.loc[cross_label, 'conversion']:.1%}")
     add_stat("PredOneConvMatch", f"{counts.loc['Match', 'conversion']:.1%}")
@@ -113,14 +98,14 @@ def run():
     # ------------------------------------------------------------------
     order = ["Match", "Cross-axis\nmismatch", "Within-axis\nmismatch"]
     colors = [MUTED_GREY, KEEPER_BLUE, STRIKER_RED]
-    conv = [counts.loc[o, "conversion"] for o in order]
-    totals = [counts.loc[o, "total"] for o in order]
+    conv = counts.loc[order, "conversion"].to_numpy()
+    totals = counts.loc[order, "total"].to_numpy()
 
     fig, ax = plt.subplots(figsize=(4.5, 3.5))
-    goals = [counts.loc[o, "goals"] for o in order]
-    cis = [_wilson_ci(int(g), int(t)) for g, t in zip(goals, totals)]
-    yerr_lo = [c - ci[1] for c, ci in zip(conv, cis)]
-    yerr_hi = [ci[2] - c for c, ci in zip(conv, cis)]
+    goals = counts.loc[order, "goals"].to_numpy()
+    ci_lo, ci_hi = proportion_confint(goals, totals, alpha=0.05, method="wilson")
+    yerr_lo = conv - ci_lo
+    yerr_hi = ci_hi - conv
     bars = ax.bar(order, conv, yerr=[yerr_lo, yerr_hi], capsize=4,
                   color=colors, edgecolor="white", linewidth=1.2, error_kw={"lw": 1.2})
     for bar, c, t in zip(bars, conv, totals):
@@ -129,22 +114,26 @@ def run():
     ax.set_ylabel("Conversion rate (goal scored)")
     ax.set_ylim(0, 1.08)
     ax.set_title("Prediction 1: Conversion by mismatch type", fontsize=11, fontweight="bold")
-    ax.axhline(y=df["Outcome"].mean(), ls="--", color=MUTED_GREY, alpha=0.5, label="Overall mean")
+    ax.axhline(y=overall_mean, ls="--", color=MUTED_GREY, alpha=0.5, label="Overall mean")
     ax.legend(fontsize=8)
     save_fig(fig, "empirical_pred1_conversion_by_mismatch")
 
     # ------------------------------------------------------------------
     # 4b. Figure — full 3×3 heatmap
     # ------------------------------------------------------------------
-    ct = pd.crosstab(df["Kicker_Side"], df["Goalie_Side"], values=df["Outcome"],
-                     aggfunc="mean").reindex(index=["L", "C", "R"], columns=["L", "C", "R"])
-    ct_n = pd.crosstab(df["Kicker_Side"], df["Goalie_Side"]).reindex(
-        index=["L", "C", "R"], columns=["L", "C", "R"])
-
-    annot = ct.copy()
-    for r in annot.index:
-        for c in annot.columns:
-            annot.loc[r, c] = f"{ct.loc[r, c]:.0%}\n(n={ct_n.loc[r, c]})"
+    sides = SIDE_DTYPE.categories
+    cells = df.groupby(["Kicker_Side", "Goalie_Side"], observed=True)["Outcome"].agg(
+        ["mean", "size"]).unstack("Goalie_Side")
+    ct = cells["mean"].reindex(index=sides, columns=sides)
+    ct_n = cells["size"].reindex(index=sides, columns=sides).fillna(0).astype(int)
+
+    # Combinations with no penalties are NaN after the reindex; leave them blank
+    rate = ct.to_numpy()
+    empty = np.isnan(rate)
+    pct = (np.where(empty, 0, rate) * 100).round(0).astype(int).astype(str)
+    n = ct_n.to_numpy().astype(str)
+    labels = np.char.add(np.char.add(pct, "%\n(n="), np.char.add(n, ")"))
+    annot = pd.DataFrame(np.where(empty, "", labels), index=ct.index, columns=ct.columns)
 
     fig2, ax2 = plt.subplots(figsize=(4.5, 3.8))
     sns.heatmap(ct, annot=annot, fmt="", cmap="RdYlGn", vmin=0.5, vmax=1.0,
@@ -23,6 +23,7 @@ import pandas as pd
 import matplotlib.pyplot as plt
 from scipy.stats import chi2_contingency, binomtest
 import statsmodels.formula.api as smf
+from statsmodels.stats.proportion import proportion_confint
 
 from utils import (
     load_bundesliga, load_kaggle, setup_plotting, save_fig, add_stat,
@@ -30,17 +31,6 @@ from utils import (
 )
 
 
-def _wilson_ci(k, n, z=1.96):
-    """Wilson score interval for a binomial proportion."""
-    if n == 0:
-        return 0.0, 0.0, 0.0
-    p = k / n
-    denom = 1 + z**2 / n
-    centre = (p + z**2 / (2 * n)) / denom
-    margin = z * np.sqrt((p * (1 - p) + z**2 / (4 * n)) / n) / denom
-    return p, max(0, centre - margin), min(1, centre + margin)
-
-
 def run():
     print("\n" + "=" * 60)
     print("PREDICTION 2: Sequential effects (exploratory)")
@@ -54,31 +44,35 @@ def run():
     df = load_bundesliga()
 
     # Create match identifiers using date + sorted club pair
-    df["club_pair"] = df.apply(
-        lambda r: "_".join(sorted([str(r["gkclub"]), str(r["ptclub"])])), axis=1
-    )
-    df["match_id"] = df["date"].astype(str) + "_" + df["club_pair"]
-
-    # Sort by match and minute
-    df = df.sort_values(["match_id", "minute"]).reset_index(drop=True)
+    gkclub = df["gkclub"].astype(str).to_numpy()
+    ptclub = df["ptclub"].astype(str).to_numpy()
+    first = gkclub <= ptclub
+    lo = pd.Series(np.where(first, gkclub, ptclub), index=df.index)
+    hi = pd.Series(np.where(first, ptclub, gkclub), index=df.index)
+    df["club_pair"] = lo.str.cat(hi, sep="_")
+    df["match_id"] = df["date"].astype(str).str.cat(df["club_pair"], sep="_")
+
+    # Sort by match and minute (on the integer category codes, not the strings)
+    df["match_id"] = df["match_id"].astype("category")
+    codes = df["match_id"].cat.codes.to_numpy()
+    order = np.lexsort((df["minute"].to_numpy(), codes))
+    df = df.iloc[order]
 
     # Keep only multi-penalty matches
-    match_counts = df.groupby("match_id").size()
-    multi_matches = match_counts[match_counts >= 2].index
-    df_multi = df[df["match_id"].isin(multi_matches)].copy()
+    sizes = df.groupby("match_id", observed=True, sort=False)["goal"].transform("size")
+    df_multi = df.loc[sizes >= 2].copy()
 
-    n_multi_matches = len(multi_matches)
+    n_multi_matches = df_multi["match_id"].nunique()
     n_multi_penalties = len(df_multi)
     print(f"\nMulti-penalty matches: {n_multi_matches}")
     print(f"Penalties in multi-penalty matches: {n_multi_penalties}")
 
     # For each penalty, get the previous penalty's outcome in the same match
-    df_multi["prev_goal"] = df_multi.groupby("match_id")["goal"].shift(1)
-    df_pairs = df_multi.dropna(subset=["prev_goal"]).copy()
-    df_pairs["prev_goal"] = df_pairs["prev_goal"].astype(int)
+    df_multi["prev_goal"] = df_multi.groupby("match_id", observed=True, sort=False)["goal"].shift(1)
+    df_pairs = df_multi.dropna(subset=["prev_goal"])
 
     # Test: does prev penalty outcome predict current outcome?
-    ct = pd.crosstab(df_pairs["prev_goal"], df_pairs["goal"],
+    ct = pd.crosstab(df_pairs["prev_goal"].astype(int), df_pairs["goal"],
                      rownames=["Prev penalty"], colnames=["Current penalty"])
     print("\nCrosstab (prev penalty → current penalty):")
     print(ct)
@@ -91,10 +85,11 @@ def run():
         print("Insufficient categories for chi-squared test.")
 
     # Conditional probabilities
-    goal_after_goal = df_pairs[df_pairs["prev_goal"] == 1]["goal"].mean()
-    goal_after_nongoal = df_pairs[df_pairs["prev_goal"] == 0]["goal"].mean()
-    n_after_goal = len(df_pairs[df_pairs["prev_goal"] == 1])
-    n_after_nongoal = len(df_pairs[df_pairs["prev_goal"] == 0])
+    prev_stats = df_pairs.groupby("prev_goal")["goal"].agg(["sum", "size", "mean"])
+    goal_after_goal = prev_stats["mean"].get(1, float("nan"))
+    goal_after_nongoal = prev_stats["mean"].get(0, float("nan"))
+    n_after_goal = int(prev_stats["size"].get(1, 0))
+    n_after_nongoal = int(prev_stats["size"].get(0, 0))
 
     print(f"\nP(goal | prev=goal) = {goal_after_goal:.3f}  (n={n_after_goal})")
     print(f"P(goal | prev=non-goal) = {goal_after_nongoal:.3f}  (n={n_after_nongoal})")
@@ -114,21 +109,21 @@ def run():
     # ------------------------------------------------------------------
     # Disaggregate: save vs miss (prev non-goal breakdown)
     # ------------------------------------------------------------------
-    df_multi["saved"] = (df_multi["result"] == "gehalten").astype(int)
-    df_multi["prev_saved"] = df_multi.groupby("match_id")["saved"].shift(1)
-    df_pairs_detail = df_multi.dropna(subset=["prev_goal"]).copy()
-    df_pairs_detail["prev_goal"] = df_pairs_detail["prev_goal"].astype(int)
-    df_pairs_detail["prev_saved"] = df_pairs_detail["prev_saved"].astype(int)
-
-    # Previous was a save (goalkeeper stopped it)
-    prev_save_only = df_pairs_detail[(df_pairs_detail["prev_goal"] == 0) & (df_pairs_detail["prev_saved"] == 1)]
-    # Previous was a miss (kicker missed)
-    prev_miss_only = df_pairs_detail[(df_pairs_detail["prev_goal"] == 0) & (df_pairs_detail["prev_saved"] == 0)]
-
-    goal_after_save_only = prev_save_only["goal"].mean() if len(prev_save_only) > 0 else float("nan")
-    goal_after_miss = prev_miss_only["goal"].mean() if len(prev_miss_only) > 0 else float("nan")
-    n_after_save_only = len(prev_save_only)
-    n_after_miss = len(prev_miss_only)
+    df_multi["saved"] = (df_multi["result"].to_numpy() == "gehalten").astype(np.int8)
+    prev_goal = df_multi["prev_goal"].to_numpy()
+    prev_saved = df_multi.groupby("match_id", observed=True, sort=False)["saved"].shift(1).to_numpy()
+
+    # Previous was a goal, a save (goalkeeper stopped it) or a miss (kicker missed)
+    prev_state = np.where(prev_goal == 1, "goal", np.where(prev_saved == 1, "save", "miss"))
+    df_multi["prev_state"] = pd.Categorical(prev_state, categories=["goal", "save", "miss"])
+    df_multi.loc[np.isnan(prev_goal), "prev_state"] = np.nan
+
+    state_stats = df_multi.groupby("prev_state", observed=True)["goal"].agg(["mean", "size"])
+
+    goal_after_save_only = state_stats["mean"].get("save", float("nan"))
+    goal_after_miss = state_stats["mean"].get("miss", float("nan"))
+    n_after_save_only = int(state_stats["size"].get("save", 0))
+    n_after_miss = int(state_stats["size"].get("miss", 0))
 
     print(f"\nDisaggregated non-goals:")
     print(f"  P(goal | prev=save) = {goal_after_save_only:.3f}  (n={n_after_save_only})")
@@ -137,13 +132,16 @@ def run():
     # ------------------------------------------------------------------
     # Logistic regression with covariates
     # ------------------------------------------------------------------
-    df_pairs_lr = df_pairs.copy()
+    # Only the columns the formula touches, so patsy doesn't copy the rest
+    lr_cols = ["goal", "prev_goal", "goaldiff", "minute", "homegame"]
+    df_pairs_lr = df_pairs[lr_cols].copy()
     # Ensure numeric types
-    for col in ["goaldiff", "minute", "homegame", "ptexp", "gkexp"]:
-        if col in df_pairs_lr.columns:
-            df_pairs_lr[col] = pd.to_numeric(df_pairs_lr[col], errors="coerce")
+    for col in ["goaldiff", "minute", "homegame"]:
+        df_pairs_lr[col] = pd.to_numeric(df_pairs_lr[col], errors="coerce")
 
-    df_pairs_lr = df_pairs_lr.dropna(subset=["goaldiff", "minute", "homegame"])
+    df_pairs_lr = df_pairs_lr.dropna().astype({
+        "goaldiff": np.float32, "minute": np.float32, "homegame": np.int8,
+    })
 
     try:
         mod = smf.logit("goal ~ prev_goal + goaldiff + minute + homegame", data=df_pairs_lr).fit(disp=0)
@@ -181,14 +179,12 @@ def run():
     dfk = load_kaggle()
 
     # Check for consecutive same-goalkeeper penalties (proxy for same match)
-    dfk["prev_gk"] = dfk["goalkeeper_name"].shift(1)
-    dfk["prev_gk_side"] = dfk["Goalie_Side"].shift(1)
-    dfk["prev_country"] = dfk["Country"].shift(1)
-
-    same_match = dfk[
-        (dfk["goalkeeper_name"] == dfk["prev_gk"]) &
-        (dfk["Country"] == dfk["prev_country"])
-    ].copy()
+    shifted = dfk[["goalkeeper_name", "Goalie_Side", "Country"]].shift(1)
+    mask = (
+        (dfk["goalkeeper_name"].to_numpy() == shifted["goalkeeper_name"].to_numpy()) &
+        (dfk["Country"].to_numpy() == shifted["Country"].to_numpy())
+    )
+    same_match = dfk.loc[mask].assign(prev_gk_side=shifted.loc[mask, "Goalie_Side"].to_numpy())
 
     if len(same_match) > 0:
         same_match["gk_repeated"] = (same_match["Goalie_Side"] == same_match["prev_gk_side"]).astype(int)
@@ -219,16 +215,15 @@ def run():
 
     # Panel A: Bundesliga sequential
     labels_a = ["After prev.\ngoal", "After prev.\nnon-goal"]
-    k_a = [df_pairs[df_pairs["prev_goal"] == 1]["goal"].sum(),
-           df_pairs[df_pairs["prev_goal"] == 0]["goal"].sum()]
-    ns_a = [n_after_goal, n_after_nongoal]
-    vals_a = [goal_after_goal, goal_after_nongoal]
+    k_a = np.array([prev_stats["sum"].get(1, 0), prev_stats["sum"].get(0, 0)])
+    ns_a = np.array([n_after_goal, n_after_nongoal])
+    vals_a = np.array([goal_after_goal, goal_after_nongoal])
     colors_a = [STRIKER_RED, KEEPER_BLUE]
 
     # Wilson CIs
-    cis_a = [_wilson_ci(int(k), n) for k, n in zip(k_a, ns_a)]
-    yerr_lo_a = [v - ci[1] for v, ci in zip(vals_a, cis_a)]
-    yerr_hi_a = [ci[2] - v for v, ci in zip(vals_a, cis_a)]
+    ci_lo_a, ci_hi_a = proportion_confint(k_a, ns_a, alpha=0.05, method="wilson")
+    yerr_lo_a = vals_a - ci_lo_a
+    yerr_hi_a = ci_hi_a - vals_a
 
     bars_a = ax1.bar(labels_a, vals_a, yerr=[yerr_lo_a, yerr_hi_a], capsize=4,
                      color=colors_a, edgecolor="white", width=0.55, error_kw={"lw": 1.2})
@@ -237,7 +232,7 @@ def run():
                  f"{v:.1%}\n(n={n})", ha="center", va="bottom", fontsize=9)
     ax1.set_ylabel("P(goal on current penalty)")
     ax1.set_ylim(0, 1.1)
-    baseline = df["goal"].mean()
+    baseline = df["goal"].to_numpy().mean()
     ax1.axhline(baseline, ls="--", color=MUTED_GREY, alpha=0.5, label=f"Overall ({baseline:.1%})")
     ax1.set_title("A. Bundesliga: sequential\npenalty outcomes", fontsize=10, fontweight="bold")
     ax1.legend(fontsize=8)
@@ -245,13 +240,13 @@ def run():
     # Panel B: Multi-league goalkeeper repetition
     if len(same_match) > 0:
         labels_b = ["Repeat\nside", "Switch\nside"]
-        vals_b = [repeat_rate, 1 - repeat_rate]
+        vals_b = np.array([repeat_rate, 1 - repeat_rate])
         colors_b = [WARN_AMBER, FIELD_GREEN]
         # CIs for repeat/switch
-        ci_rep = _wilson_ci(n_repeat, n_same)
-        ci_sw = _wilson_ci(n_same - n_repeat, n_same)
-        yerr_lo_b = [repeat_rate - ci_rep[1], (1 - repeat_rate) - ci_sw[1]]
-        yerr_hi_b = [ci_rep[2] - repeat_rate, ci_sw[2] - (1 - repeat_rate)]
+        ci_lo_b, ci_hi_b = proportion_confint(np.array([n_repeat, n_same - n_repeat]), n_same,
+                                              alpha=0.05, method="wilson")
+        yerr_lo_b = vals_b - ci_lo_b
+        yerr_hi_b = ci_hi_b - vals_b
 
         bars_b = ax2.bar(labels_b, vals_b, yerr=[yerr_lo_b, yerr_hi_b], capsize=4,
                          color=colors_b, edgecolor="white", width=0.55, error_kw={"lw": 1.2})
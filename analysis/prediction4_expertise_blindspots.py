@@ -15,9 +15,9 @@ import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
-from scipy.stats import spearmanr
+from scipy.special import expit
+from scipy.stats import rankdata, t as student_t
 import statsmodels.api as sm
-import statsmodels.formula.api as smf
 
 from utils import (
     load_bundesliga, setup_plotting, save_fig, add_stat,
@@ -37,14 +37,19 @@ def run():
     # 1. Compute save rate per goalkeeper-experience level
     # ------------------------------------------------------------------
     # Binary: 1 = save (gehalten), 0 = goal or miss
-    df["saved"] = (df["result"] == "gehalten").astype(int)
+    df["saved"] = (df["result"].to_numpy() == "gehalten").astype(np.int8)
 
     # Group by experience bins
     max_exp = int(df["gkexp"].max())
-    exp_group = df.groupby("gkexp").agg(
-        n_penalties=("saved", "count"),
-        n_saves=("saved", "sum"),
-    ).reset_index()
+    gk = df["gkexp"].to_numpy(dtype=np.int64)
+    n_pen = np.bincount(gk)
+    n_sav = np.bincount(gk, weights=df["saved"].to_numpy()).astype(np.int64)
+    exp_group = pd.DataFrame({
+        "gkexp": np.arange(len(n_pen)),
+        "n_penalties": n_pen,
+        "n_saves": n_sav,
+    })
+    exp_group = exp_group[exp_group["n_penalties"] > 0].reset_index(drop=True)
     exp_group["save_rate"] = exp_group["n_saves"] / exp_group["n_penalties"]
 
     print("\nSave rate by goalkeeper experience (seasons):")
@@ -58,12 +63,16 @@ def run():
     # ------------------------------------------------------------------
     # 2. Logistic regression: save ~ gkexp + gkexp^2 (test quadratic)
     # ------------------------------------------------------------------
-    df["gkexp2"] = df["gkexp"] ** 2
+    # Design matrices built directly (no formula parsing)
+    gkexp = df["gkexp"].to_numpy(dtype=np.float64)
+    saved = df["saved"].to_numpy(dtype=np.float64)
+    X_quad = pd.DataFrame({"Intercept": 1.0, "gkexp": gkexp, "gkexp2": gkexp ** 2})
+    X_lin = X_quad[["Intercept", "gkexp"]]
 
     # Linear model
-    mod_lin = smf.logit("saved ~ gkexp", data=df).fit(disp=0)
+    mod_lin = sm.Logit(saved, X_lin).fit(disp=0)
     # Quadratic model
-    mod_quad = smf.logit("saved ~ gkexp + gkexp2", data=df).fit(disp=0)
+    mod_quad = sm.Logit(saved, X_quad).fit(disp=0)
 
     print("\n--- Linear logistic regression ---")
     print(mod_lin.summary2().tables[1].to_string())
@@ -80,7 +89,12 @@ def run():
     print(f"\nLR test for quadratic term: χ²={lr_stat:.3f}, p={lr_p:.4f}")
 
     # Spearman correlation: experience vs save rate (at group level)
-    rho, p_spearman = spearmanr(exp_group["gkexp"], exp_group["save_rate"])
+    r_exp = rankdata(exp_group["gkexp"].to_numpy())
+    r_save = rankdata(exp_group["save_rate"].to_numpy())
+    rho = np.corrcoef(r_exp, r_save)[0, 1]
+    n_groups = len(r_exp)
+    t_stat = rho * np.sqrt((n_groups - 2) / (1 - rho**2))
+    p_spearman = 2 * student_t.sf(abs(t_stat), n_groups - 2)
     print(f"Spearman ρ (exp vs save rate): {rho:.3f}, p={p_spearman:.4f}")
 
     # Peak of quadratic
@@ -118,11 +132,11 @@ def run():
     x_pred = np.linspace(0, max_exp, 200)
     # Linear fit
     logit_lin = mod_lin.params["Intercept"] + mod_lin.params["gkexp"] * x_pred
-    y_lin = 1 / (1 + np.exp(-logit_lin))
+    y_lin = expit(logit_lin)
     ax.plot(x_pred, y_lin, color=MUTED_GREY, ls="--", lw=1.5, label="Linear fit")
     # Quadratic fit
     logit_quad = b0 + b1 * x_pred + b2 * x_pred ** 2
-    y_quad = 1 / (1 + np.exp(-logit_quad))
+    y_quad = expit(logit_quad)
     ax.plot(x_pred, y_quad, color=STRIKER_RED, lw=2, label="Quadratic fit")
 
     if not np.isnan(peak_exp) and 0 < peak_exp < max_exp:
@@ -141,15 +155,28 @@ def run():
     # ------------------------------------------------------------------
     # Split into "readable" (goals = Tor, saves = gehalten) and
     # "unreadable" (post/bar/high misses — suggest well-placed shots)
-    df["shot_type"] = df["result_en"].apply(
-        lambda x: "Readable" if x in ("Goal", "Save") else "Unreadable\n(post/bar/high)"
+    is_readable = df["result_en"].isin(("Goal", "Save")).to_numpy()
+    df["shot_type"] = pd.Categorical(
+        np.where(is_readable, "Readable", "Unreadable\n(post/bar/high)"),
+        categories=["Readable", "Unreadable\n(post/bar/high)"],
     )
     # For "readable" shots, save rate = saves / (goals + saves)
-    readable = df[df["shot_type"] == "Readable"].copy()
-    readable["exp_bin"] = pd.cut(readable["gkexp"], bins=[0, 3, 6, 9, 99],
-                                  labels=["0-3", "4-6", "7-9", "10+"], right=True)
-    save_by_bin = readable.groupby("exp_bin", observed=True)["saved"].agg(["mean", "count"]).reset_index()
-    save_by_bin.columns = ["Experience bin", "Save rate", "n"]
+    readable = df[df["shot_type"] == "Readable"]
+    # Right-closed bins (0, 3], (3, 6], (6, 9], (9, 99]
+    edges = np.array([0, 3, 6, 9, 99])
+    bin_labels = np.array(["0-3", "4-6", "7-9", "10+"])
+    bins = np.searchsorted(edges, readable["gkexp"].to_numpy(), side="left") - 1
+    in_range = (bins >= 0) & (bins < len(bin_labels))
+    bins = bins[in_range]
+    saved_arr = readable["saved"].to_numpy()[in_range]
+    bin_n = np.bincount(bins, minlength=len(bin_labels))
+    bin_saves = np.bincount(bins, weights=saved_arr, minlength=len(bin_labels))
+    observed = bin_n > 0
+    save_by_bin = pd.DataFrame({
+        "Experience bin": bin_labels[observed],
+        "Save rate": bin_saves[observed] / bin_n[observed],
+        "n": bin_n[observed],
+    })
 
     fig2, ax2 = plt.subplots(figsize=(4.5, 3.5))
     colors_bin = [KEEPER_BLUE, FIELD_GREEN, WARN_AMBER, STRIKER_RED]
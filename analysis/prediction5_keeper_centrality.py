@@ -16,7 +16,7 @@ import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 from scipy.stats import fisher_exact, chi2_contingency
-from statsmodels.stats.proportion import proportions_ztest
+from statsmodels.stats.proportion import proportions_ztest, proportion_confint
 
 from utils import (
     load_kaggle, load_bundesliga, setup_plotting, save_fig, add_stat,
@@ -24,17 +24,6 @@ from utils import (
 )
 
 
-def _wilson_ci(k, n, z=1.96):
-    """Wilson score interval for a binomial proportion."""
-    if n == 0:
-        return 0.0, 0.0, 0.0
-    p = k / n
-    denom = 1 + z**2 / n
-    centre = (p + z**2 / (2 * n)) / denom
-    margin = z * np.sqrt((p * (1 - p) + z**2 / (4 * n)) / n) / denom
-    return p, max(0, centre - margin), min(1, centre + margin)
-
-
 def run():
     print("\n" + "=" * 60)
     print("PREDICTION 5: Keeper centrality and striker interference")
@@ -46,36 +35,32 @@ def run():
     # ------------------------------------------------------------------
     # 1. Conversion rate: goalkeeper central vs dive L/R
     # ------------------------------------------------------------------
-    df["gk_action"] = df["Goalie_Side"].apply(lambda x: "Stay central" if x == "C" else "Dive L/R")
-
-    grp = df.groupby("gk_action")["Outcome"].agg(["sum", "count"]).reset_index()
-    grp.columns = ["gk_action", "goals", "total"]
-    grp["conversion"] = grp["goals"] / grp["total"]
+    df["gk_action"] = pd.Categorical(
+        np.where(df["Goalie_Side"].to_numpy() == "C", "Stay central", "Dive L/R"),
+        categories=["Stay central", "Dive L/R"],
+    )
+
+    # (goals, total) per action, ordered {central, dive}
+    codes = df["gk_action"].cat.codes.to_numpy()
+    nobs = np.bincount(codes, minlength=2)
+    count = np.bincount(codes, weights=df["Outcome"].to_numpy(), minlength=2).astype(np.int64)
+    grp = pd.DataFrame({"goals": count, "total": nobs, "conversion": count / nobs},
+                       index=df["gk_action"].cat.categories.rename("gk_action"))
     print("\nConversion rate by goalkeeper action:")
-    print(grp.to_string(index=False))
-
-    central = df[df["gk_action"] == "Stay central"]
-    dive = df[df["gk_action"] == "Dive L/R"]
+    print(grp.reset_index().to_string(index=False))
 
     # Fisher exact test (is conversion lower when keeper central?)
-    table = np.array([
-        [central["Outcome"].sum(), len(central) - central["Outcome"].sum()],
-        [dive["Outcome"].sum(), len(dive) - dive["Outcome"].sum()],
-    ])
+    table = np.column_stack([count, nobs - count])
     or_val, p_fish = fisher_exact(table, alternative="less")
     print(f"\nFisher exact (central < dive conversion): OR={or_val:.3f}, p={p_fish:.4f}")
 
     # Two-proportion z-test
-    count = np.array([central["Outcome"].sum(), dive["Outcome"].sum()])
-    nobs = np.array([len(central), len(dive)])
     z_stat, p_z = proportions_ztest(count, nobs, alternative="smaller")
     print(f"Two-proportion z-test: z={z_stat:.3f}, p={p_z:.4f}")
 
     # Stats
-    n_central = len(central)
-    n_dive = len(dive)
-    conv_central = central["Outcome"].mean()
-    conv_dive = dive["Outcome"].mean()
+    n_central, n_dive = nobs
+    conv_central, conv_dive = count / nobs
 
     add_stat("PredFiveNCentral", str(n_central))
     add_stat("PredFiveNDive", str(n_dive))
@@ -91,14 +76,13 @@ def run():
     # ------------------------------------------------------------------
     fig, ax = plt.subplots(figsize=(3.8, 3.5))
     labels = ["Stay central", "Dive L/R"]
-    convs = [conv_central, conv_dive]
-    ns = [n_central, n_dive]
+    convs = np.array([conv_central, conv_dive])
+    ns = nobs
     colors = [FIELD_GREEN, KEEPER_BLUE]
 
-    goals_list = [central["Outcome"].sum(), dive["Outcome"].sum()]
-    cis = [_wilson_ci(int(g), int(n)) for g, n in zip(goals_list, ns)]
-    yerr_lo = [c - ci[1] for c, ci in zip(convs, cis)]
-    yerr_hi = [ci[2] - c for c, ci in zip(convs, cis)]
+    ci_lo, ci_hi = proportion_confint(count, ns, alpha=0.05, method="wilson")
+    yerr_lo = convs - ci_lo
+    yerr_hi = ci_hi - convs
     bars = ax.bar(labels, convs, yerr=[yerr_lo, yerr_hi], capsize=4,
                   color=colors, edgecolor="white", linewidth=1.2, width=0.55, error_kw={"lw": 1.2})
     for bar, c, n in zip(bars, convs, ns):
@@ -116,8 +100,10 @@ def run():
     # ------------------------------------------------------------------
     # 3. Supplementary: Kicker side distribution against central keepers
     # ------------------------------------------------------------------
-    kick_vs_central = central["Kicker_Side"].value_counts()
-    kick_vs_dive = dive["Kicker_Side"].value_counts(normalize=True)
+    # Select just the columns needed rather than copying whole sub-frames
+    is_central = codes == 0
+    kick_vs_central = df["Kicker_Side"][is_central].value_counts()
+    dive = df.loc[~is_central, ["Kicker_Side", "Outcome"]]
 
     fig2, (ax2a, ax2b) = plt.subplots(1, 2, figsize=(7, 3.2))
 
@@ -130,10 +116,10 @@ def run():
         ax2a.set_title("Shots vs. central keeper", fontsize=10)
 
     # Panel B: conversion by kicker side when keeper dives
+    dive_means = dive.groupby("Kicker_Side", observed=True)["Outcome"].mean()
     for side in ["L", "C", "R"]:
-        sub = dive[dive["Kicker_Side"] == side]
-        if len(sub) > 0:
-            ax2b.bar(side, sub["Outcome"].mean(),
+        if side in dive_means.index:
+            ax2b.bar(side, dive_means[side],
                      color={"L": STRIKER_RED, "C": WARN_AMBER, "R": KEEPER_BLUE}[side],
                      edgecolor="white")
     ax2b.set_ylabel("Conversion rate")
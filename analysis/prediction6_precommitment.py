@@ -20,7 +20,8 @@ import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 from scipy.stats import chi2_contingency, fisher_exact
-import statsmodels.formula.api as smf
+import statsmodels.api as sm
+from statsmodels.stats.proportion import proportion_confint
 
 from utils import (
     load_kaggle, setup_plotting, save_fig, add_stat,
@@ -28,30 +29,20 @@ from utils import (
 )
 
 
-def _wilson_ci(k, n, z=1.96):
-    """Wilson score interval for a binomial proportion."""
-    if n == 0:
-        return 0.0, 0.0, 0.0
-    p = k / n
-    denom = 1 + z**2 / n
-    centre = (p + z**2 / (2 * n)) / denom
-    margin = z * np.sqrt((p * (1 - p) + z**2 / (4 * n)) / n) / denom
-    return p, max(0, centre - margin), min(1, centre + margin)
-
-
-def classify_congruence(row):
+def classify_congruence(df):
     """
     Classify shot as natural (cross-body) or unnatural.
     Right foot → natural target is Left (cross-body power).
     Left foot  → natural target is Right (cross-body power).
     Centre shots are ambiguous (classified separately).
     """
-    foot, side = row["Kicker_Foot"], row["Kicker_Side"]
-    if side == "C":
-        return "Centre"
-    if (foot == "R" and side == "L") or (foot == "L" and side == "R"):
-        return "Natural\n(cross-body)"
-    return "Unnatural\n(same-side)"
+    foot = df["Kicker_Foot"].to_numpy()
+    side = df["Kicker_Side"].to_numpy()
+    natural = ((foot == "R") & (side == "L")) | ((foot == "L") & (side == "R"))
+    labels = np.where(side == "C", "Centre",
+                      np.where(natural, "Natural\n(cross-body)", "Unnatural\n(same-side)"))
+    return pd.Categorical(labels, categories=["Natural\n(cross-body)", "Centre",
+                                              "Unnatural\n(same-side)"])
 
 
 def run():
@@ -65,24 +56,31 @@ def run():
     # ------------------------------------------------------------------
     # 1. Classify each kick
     # ------------------------------------------------------------------
-    df["congruence"] = df.apply(classify_congruence, axis=1)
-
-    grp = df.groupby("congruence")["Outcome"].agg(["sum", "count"]).reset_index()
-    grp.columns = ["congruence", "goals", "total"]
-    grp["conversion"] = grp["goals"] / grp["total"]
+    df["congruence"] = classify_congruence(df)
+
+    # (goals, total) per category, ordered {natural, centre, unnatural}
+    codes = df["congruence"].cat.codes.to_numpy()
+    totals = np.bincount(codes, minlength=3)
+    goals = np.bincount(codes, weights=df["Outcome"].to_numpy(), minlength=3).astype(np.int64)
+    conversion = np.divide(goals, totals, out=np.full(3, np.nan), where=totals > 0)
+    n_nat, n_centre, n_unnat = totals
+    conv_nat, conv_centre, conv_unnat = conversion
+
+    grp = pd.DataFrame({
+        "congruence": df["congruence"].cat.categories,
+        "goals": goals,
+        "total": totals,
+        "conversion": conversion,
+    })[totals > 0]
     print("\nConversion rate by foot-side congruence:")
     print(grp.to_string(index=False))
 
-    natural = df[df["congruence"] == "Natural\n(cross-body)"]
-    unnatural = df[df["congruence"] == "Unnatural\n(same-side)"]
-    centre = df[df["congruence"] == "Centre"]
-
     # ------------------------------------------------------------------
     # 2. Fisher exact: natural vs unnatural
     # ------------------------------------------------------------------
     table = np.array([
-        [natural["Outcome"].sum(), len(natural) - natural["Outcome"].sum()],
-        [unnatural["Outcome"].sum(), len(unnatural) - unnatural["Outcome"].sum()],
+        [goals[0], totals[0] - goals[0]],
+        [goals[2], totals[2] - goals[2]],
     ])
     or_val, p_fish = fisher_exact(table, alternative="greater")
     print(f"\nFisher exact (natural > unnatural): OR={or_val:.3f}, p={p_fish:.4f}")
@@ -94,20 +92,18 @@ def run():
     df_lr["natural"] = (df_lr["congruence"] == "Natural\n(cross-body)").astype(int)
     df_lr["gk_match"] = (df_lr["Kicker_Side"] == df_lr["Goalie_Side"]).astype(int)
 
-    mod = smf.logit("Outcome ~ natural + gk_match", data=df_lr).fit(disp=0)
+    X = df_lr[["natural", "gk_match"]].astype(np.float64)
+    X.insert(0, "Intercept", 1.0)
+    mod = sm.Logit(df_lr["Outcome"].to_numpy(dtype=np.float64), X).fit(disp=0)
     print("\nLogistic regression: Outcome ~ natural + gk_match")
     print(mod.summary2().tables[1].to_string())
 
     # ------------------------------------------------------------------
     # 4. Register stats
     # ------------------------------------------------------------------
-    conv_nat = natural["Outcome"].mean()
-    conv_unnat = unnatural["Outcome"].mean()
-    conv_centre = centre["Outcome"].mean() if len(centre) > 0 else float("nan")
-
-    add_stat("PredSixNNatural", str(len(natural)))
-    add_stat("PredSixNUnnatural", str(len(unnatural)))
-    add_stat("PredSixNCentre", str(len(centre)))
+    add_stat("PredSixNNatural", str(n_nat))
+    add_stat("PredSixNUnnatural", str(n_unnat))
+    add_stat("PredSixNCentre", str(n_centre))
     add_stat("PredSixConvNatural", f"{conv_nat:.1%}")
     add_stat("PredSixConvUnnatural", f"{conv_unnat:.1%}")
     add_stat("PredSixConvCentre", f"{conv_centre:.1%}")
@@ -131,7 +127,7 @@ def run():
             c = sub["conversion"].values[0]
             n = sub["total"].values[0]
             g = sub["goals"].values[0]
-            _, ci_lo, ci_hi = _wilson_ci(int(g), int(n))
+            ci_lo, ci_hi = proportion_confint(g, n, alpha=0.05, method="wilson")
             yerr = [[c - ci_lo], [ci_hi - c]]
             bar = ax.bar(i, c, yerr=yerr, capsize=4, color=col, edgecolor="white",
                          linewidth=1.2, width=0.6, error_kw={"lw": 1.2})
@@ -151,20 +147,20 @@ def run():
     # ------------------------------------------------------------------
     # 6. Figure — interaction: congruence × gk_match
     # ------------------------------------------------------------------
-    df_lr["gk_label"] = df_lr["gk_match"].map({0: "Keeper wrong", 1: "Keeper correct"})
-    df_lr["cong_label"] = df_lr["natural"].map({1: "Natural", 0: "Unnatural"})
-
-    interact = df_lr.groupby(["cong_label", "gk_label"])["Outcome"].agg(["mean", "count"]).reset_index()
+    # 2×2 tabulation indexed [natural, gk_match]
+    cell = df_lr["natural"].to_numpy() * 2 + df_lr["gk_match"].to_numpy()
+    cell_n = np.bincount(cell, minlength=4)
+    cell_goals = np.bincount(cell, weights=df_lr["Outcome"].to_numpy(), minlength=4)
+    cell_mean = (cell_goals / np.maximum(cell_n, 1)).reshape(2, 2)
+    cell_n = cell_n.reshape(2, 2)
 
     fig2, ax2 = plt.subplots(figsize=(5, 3.5))
     x = np.arange(2)
     width = 0.32
     for i, gk in enumerate(["Keeper wrong", "Keeper correct"]):
-        sub = interact[interact["gk_label"] == gk]
-        vals = [sub[sub["cong_label"] == c]["mean"].values[0] if len(sub[sub["cong_label"] == c]) > 0 else 0
-                for c in ["Natural", "Unnatural"]]
-        ns = [sub[sub["cong_label"] == c]["count"].values[0] if len(sub[sub["cong_label"] == c]) > 0 else 0
-              for c in ["Natural", "Unnatural"]]
+        # Bars ordered {natural, unnatural}; column i is gk_match == i
+        vals = cell_mean[[1, 0], i]
+        ns = cell_n[[1, 0], i]
         col = KEEPER_BLUE if gk == "Keeper correct" else STRIKER_RED
         bars = ax2.bar(x + i * width, vals, width, label=gk, color=col,
                        edgecolor="white", linewidth=1)
@@ -3,10 +3,14 @@ Shared utilities for penalty kick analysis scripts.
 Handles data loading, LaTeX stat macro generation, and common plotting setup.
 """
 
+import functools
+import io
 import os
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
 import matplotlib
+matplotlib.use("Agg")  # non-interactive backend
+import matplotlib.pyplot as plt
 import seaborn as sns
 
 # ---------------------------------------------------------------------------
@@ -20,22 +24,48 @@ STATS_FILE = os.path.join(PROJECT_ROOT, "manuscript", "generated_stats.tex")
 KAGGLE_CSV = os.path.join(DATA_DIR, "kaggle_penalty_kicks_2020_2025.csv")
 BUNDESLIGA_CSV = os.path.join(DATA_DIR, "bundesliga_penalties_1963_2017.csv")
 
+# Shot / dive directions, in left-to-right order
+SIDE_DTYPE = pd.CategoricalDtype(["L", "C", "R"])
+
 
 def ensure_dirs():
     """Create output directories if they don't exist."""
     os.makedirs(FIGURES_DIR, exist_ok=True)
 
 
-def load_kaggle():
-    """Load and return the Kaggle penalty-kick dataset (2020-2025)."""
-    df = pd.read_csv(KAGGLE_CSV)
-    df["Country"] = df["Country"].str.strip()
+# Columns the analyses read, with explicit dtypes so pandas skips inference
+KAGGLE_DTYPES = {
+    "Country": str,
+    "Kicker_Foot": "category",
+    "Kicker_Side": SIDE_DTYPE,
+    "Goalie_Side": SIDE_DTYPE,
+    "Outcome": np.int8,
+    "goalkeeper_name": "category",
+}
+BUNDESLIGA_DTYPES = {
+    "date": np.float64,
+    "homegame": np.float32,
+    "result": "category",
+    "minute": np.float32,
+    "goaldiff": np.float32,
+    "gkclub": str,
+    "ptclub": str,
+    "gkexp": np.float64,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _load_kaggle(mtime):
+    """Parse and clean the Kaggle CSV; cached per file mtime."""
+    df = pd.read_csv(KAGGLE_CSV, usecols=list(KAGGLE_DTYPES), dtype=KAGGLE_DTYPES)
+    df["Country"] = df["Country"].str.strip().astype("category")
     return df
 
 
-def load_bundesliga():
-    """Load and return the Bundesliga penalty dataset (1963-2017)."""
-    df = pd.read_csv(BUNDESLIGA_CSV)
+@functools.lru_cache(maxsize=None)
+def _load_bundesliga(mtime):
+    """Parse and recode the Bundesliga CSV; cached per file mtime."""
+    df = pd.read_csv(BUNDESLIGA_CSV, usecols=list(BUNDESLIGA_DTYPES), dtype=BUNDESLIGA_DTYPES)
     # Recode result to English and to binary (goal=1, save/miss=0)
     result_map = {
         "Tor": "Goal",
@@ -45,15 +75,36 @@ def load_bundesliga():
         "Latte": "Miss (crossbar)",
         "Pfosten": "Miss (post)",
     }
-    df["result_en"] = df["result"].map(result_map)
-    df["goal"] = (df["result"] == "Tor").astype(int)
+    df["result_en"] = pd.Categorical(df["result"].map(result_map),
+                                     categories=list(result_map.values()))
+    df["goal"] = (df["result"].to_numpy() == "Tor").astype(np.int8)
+    df["gkexp"] = df["gkexp"].astype(np.int16)
     return df
 
 
+def load_kaggle():
+    """Load and return the Kaggle penalty-kick dataset (2020-2025)."""
+    return _load_kaggle(os.path.getmtime(KAGGLE_CSV)).copy()
+
+
+def load_bundesliga():
+    """Load and return the Bundesliga penalty dataset (1963-2017)."""
+    return _load_bundesliga(os.path.getmtime(BUNDESLIGA_CSV)).copy()
+
+
 # ---------------------------------------------------------------------------
 # LaTeX stats-macro helpers
 # ---------------------------------------------------------------------------
-_stat_lines: list[str] = []
+_stat_lines: list[tuple[str, str]] = []  # (command name, escaped value)
+
+# Single-character LaTeX escapes; \% produces a literal percent sign in LaTeX
+_LATEX_ESCAPES = str.maketrans({
+    "_": "\\_",
+    "&": "\\&",
+    "#": "\\#",
+    "$": "\\$",
+    "%": "\\%",
+})
 
 
 def init_stats():
@@ -67,18 +118,9 @@ def add_stat(name: str, value: str):
     Register a LaTeX command \\name that expands to *value*.
     name should be a valid LaTeX command name (letters only, no backslash).
     """
-    # Escape special LaTeX characters in value
-    safe = (
-        str(value)
-        .replace("\\", "\\textbackslash{}")
-        .replace("_", "\\_")
-        .replace("&", "\\&")
-        .replace("#", "\\#")
-        .replace("$", "\\$")
-    )
-    # \% produces a literal percent sign in LaTeX
-    safe = safe.replace("%", "\\%")
-    _stat_lines.append(f"\\newcommand{{\\{name}}}{{{safe}}}")
+    # Escape special LaTeX characters in value (backslashes before the escapes add more)
+    safe = str(value).replace("\\", "\\textbackslash{}").translate(_LATEX_ESCAPES)
+    _stat_lines.append((name, safe))
 
 
 def write_stats():
@@ -89,10 +131,12 @@ def write_stats():
         "% Regenerated every time `make` or `run_all.py` is executed.\n"
         "% ============================================================\n"
     )
+    buf = io.StringIO()
+    buf.write(header)
+    for name, safe in _stat_lines:
+        buf.write(f"\\newcommand{{\\{name}}}{{{safe}}}\n")
     with open(STATS_FILE, "w") as f:
-        f.write(header)
-        f.write("\n".join(_stat_lines))
-        f.write("\n")
+        f.write(buf.getvalue())
 
 
 # ---------------------------------------------------------------------------
@@ -108,9 +152,14 @@ MUTED_GREY = "#6B7280"
 PALETTE = [KEEPER_BLUE, STRIKER_RED, FIELD_GREEN, WARN_AMBER, MUTED_GREY]
 
 
+_plotting_ready = False
+
+
 def setup_plotting():
-    """Apply global matplotlib / seaborn style."""
-    matplotlib.use("Agg")  # non-interactive backend
+    """Apply global matplotlib / seaborn style (only the first call does any work)."""
+    global _plotting_ready
+    if _plotting_ready:
+        return
     sns.set_theme(
         style="whitegrid",
         context="paper",
@@ -124,15 +173,32 @@ def setup_plotting():
             "text.color": "#1F2937",
         },
     )
+    _plotting_ready = True
+
+
+# Per-format savefig options: no PDF creator/producer stamps. The PNGs are
+# committed and embedded in the manuscript, so they keep default compression.
+_SAVE_KWARGS = {
+    "png": {},
+    "pdf": {"metadata": {"Creator": None, "Producer": None}},
+}
+# Fast zlib for PNG-only iteration runs, whose output is not meant to be kept
+_QUICK_PNG_KWARGS = {"pil_kwargs": {"compress_level": 1}}
 
 
 def save_fig(fig, name, tight=True):
-    """Save a figure as both PNG and PDF in the manuscript figures directory."""
+    """
+    Save a figure as both PNG and PDF in the manuscript figures directory.
+    Set the SKIP_PDF environment variable to write PNG only (quick iteration).
+    """
     ensure_dirs()
     if tight:
         fig.tight_layout()
-    for ext in ("png", "pdf"):
+    quick = bool(os.environ.get("SKIP_PDF"))
+    exts = ("png",) if quick else ("png", "pdf")
+    for ext in exts:
         path = os.path.join(FIGURES_DIR, f"{name}.{ext}")
-        fig.savefig(path, bbox_inches="tight")
+        kwargs = _QUICK_PNG_KWARGS if quick else _SAVE_KWARGS[ext]
+        fig.savefig(path, bbox_inches="tight", **kwargs)
     plt.close(fig)
-    print(f"  → Saved {name}.png / .pdf")
+    print(f"  → Saved {name}." + " / .".join(exts))
@@ -3,24 +3,37 @@
 Generate figures for: The Subspace Penalty Kick
 Uses matplotlib for diagrams and optionally Google's Imagen API for photorealistic images.
 
-For Imagen API: requires GOOGLE_API_KEY environment variable.
+For Imagen API: pass --imagen; requires GOOGLE_API_KEY environment variable.
 Falls back to matplotlib-only diagrams if API is unavailable.
 
 Usage:
     pip install matplotlib numpy requests Pillow
     python generate_figures.py
+    python generate_figures.py --png-only   # skips the PDF backend
+    python generate_figures.py --preview    # 100 dpi *_preview.png only, for quick checks
+    python generate_figures.py --figures 1,3
+    python generate_figures.py --imagen     # also request the photorealistic images
 """
 
 import os
 import sys
 import json
+import base64
+import shutil
+import hashlib
+import argparse
+from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 import numpy as np
 import matplotlib
 matplotlib.use('Agg')
-import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
-from matplotlib.patches import FancyArrowPatch, FancyBboxPatch
+from matplotlib.patches import Ellipse, FancyArrowPatch, FancyBboxPatch
 from matplotlib.colors import LinearSegmentedColormap
+from matplotlib.collections import PatchCollection
+from matplotlib.figure import Figure
+from matplotlib.font_manager import FontProperties
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 
 # --- Configuration ---
 FIG_DIR = os.path.join(os.path.dirname(__file__), 'figures')
@@ -38,7 +51,11 @@ CARD_BG = '#1A2236'
 TEXT_COLOR = '#E8EAF0'
 MUTED = '#6B7280'
 
-plt.rcParams.update({
+# Seed for the simulated data; each figure draws from its own Generator so
+# its noise does not depend on which other figures ran first.
+SEED = 42
+
+PAPER_RC = {
     'figure.facecolor': 'white',
     'axes.facecolor': '#F8FAFC',
     'axes.edgecolor': '#CBD5E1',
@@ -51,12 +68,67 @@ plt.rcParams.update({
     'axes.grid': True,
     'grid.alpha': 0.3,
     'grid.color': '#E2E8F0',
-})
+}
+
+# Applied once at import; every figure function inherits it
+matplotlib.rcParams.update(PAPER_RC)
+
+# Shared fonts for the repeated fig1 headings and box labels
+FP_TITLE = FontProperties(size=9, weight='bold')
+FP_LABEL = FontProperties(size=8, weight='bold')
+
+
+def new_figure(nrows, ncols, figsize):
+    """Create a Figure on an Agg canvas with its subplot grid, bypassing pyplot.
+
+    Figures built this way are not registered with pyplot's figure manager, so
+    they need no explicit close and are freed when the caller returns.
+    """
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig, fig.subplots(nrows, ncols)
+
+
+# Output formats. main.tex includes the 200 dpi PNGs, so 'preview' writes its
+# 100 dpi quick-check images to separate *_preview.png files instead.
+FORMATS = ('pdf', 'png')
+FILENAMES = {
+    'pdf': '{name}.pdf',
+    'png': '{name}.png',
+    'preview': '{name}_preview.png',
+}
+SAVE_KWARGS = {
+    'pdf': {'dpi': 300},
+    'png': {'dpi': 200},
+    'preview': {'dpi': 100, 'pil_kwargs': {'optimize': False, 'compress_level': 1}},
+}
+
+
+def save_figure(fig, name, formats=FORMATS):
+    """Save ``fig`` to FIG_DIR in each of ``formats``.
+
+    The tight bounding box is measured once and reused for every file instead
+    of being recomputed by each ``bbox_inches='tight'`` save.
+    """
+    bbox = fig.get_tightbbox(fig.canvas.get_renderer()).padded(0.1)
+    for fmt in formats:
+        path = os.path.join(FIG_DIR, FILENAMES[fmt].format(name=name))
+        fig.savefig(path, bbox_inches=bbox, **SAVE_KWARGS[fmt])
+
+
+def draw_task_boxes(ax, tasks):
+    """Draw labelled task boxes, given (label, x, y, color) tuples, as one PatchCollection."""
+    boxes = [FancyBboxPatch((x - 1.3, y - 0.6), 2.6, 1.2, boxstyle="round,pad=0.15",
+                            facecolor=color, alpha=0.2, edgecolor=color, linewidth=1.5)
+             for label, x, y, color in tasks]
+    ax.add_collection(PatchCollection(boxes, match_original=True))
+    for label, x, y, color in tasks:
+        ax.text(x, y, label, ha='center', va='center', fontproperties=FP_LABEL, color=color)
 
 
-def fig1_task_mapping():
+def fig1_task_mapping(formats=FORMATS):
     """Figure 1: Mapping the monkey task onto the penalty kick."""
-    fig, axes = plt.subplots(1, 2, figsize=(10, 4.5))
+    fig, axes = new_figure(1, 2, figsize=(10, 4.5))
 
     # Left: Monkey task structure
     ax = axes[0]
@@ -72,11 +144,7 @@ def fig1_task_mapping():
         ('C1: Colour→Axis 1', 5, 7.5, FIELD_GREEN),
         ('C2: Colour→Axis 2', 8.5, 7.5, KEEPER_BLUE),
     ]
-    for label, x, y, color in tasks:
-        box = FancyBboxPatch((x - 1.3, y - 0.6), 2.6, 1.2, boxstyle="round,pad=0.15",
-                             facecolor=color, alpha=0.2, edgecolor=color, linewidth=1.5)
-        ax.add_patch(box)
-        ax.text(x, y, label, ha='center', va='center', fontsize=8, fontweight='bold', color=color)
+    draw_task_boxes(ax, tasks)
 
     # Shared components
     ax.annotate('', xy=(5, 8.5), xytext=(8.5, 8.5),
@@ -88,13 +156,13 @@ def fig1_task_mapping():
     ax.text(3.25, 6.1, 'Shared: Axis 1', ha='center', fontsize=7, color=WARN_ORANGE, style='italic')
 
     # Subspace labels
-    ax.text(5, 4.5, 'Sensory Subspaces', ha='center', fontsize=9, fontweight='bold')
+    ax.text(5, 4.5, 'Sensory Subspaces', ha='center', fontproperties=FP_TITLE)
     ax.text(3, 3.7, 'Colour', ha='center', fontsize=8, color=KEEPER_BLUE,
             bbox=dict(boxstyle='round', facecolor=KEEPER_BLUE, alpha=0.15))
     ax.text(7, 3.7, 'Shape', ha='center', fontsize=8, color=WARN_ORANGE,
             bbox=dict(boxstyle='round', facecolor=WARN_ORANGE, alpha=0.15))
 
-    ax.text(5, 1.8, 'Motor Subspaces', ha='center', fontsize=9, fontweight='bold')
+    ax.text(5, 1.8, 'Motor Subspaces', ha='center', fontproperties=FP_TITLE)
     ax.text(3, 1.2, 'Axis 1 (UL/LR)', ha='center', fontsize=8, color=WARN_ORANGE,
             bbox=dict(boxstyle='round', facecolor=WARN_ORANGE, alpha=0.15))
     ax.text(7, 1.2, 'Axis 2 (UR/LL)', ha='center', fontsize=8, color=KEEPER_BLUE,
@@ -114,18 +182,14 @@ def fig1_task_mapping():
         ('Dive Right', 5, 7.5, CYAN),
         ('Stay/Low', 8.5, 7.5, PURPLE),
     ]
-    for label, x, y, color in gk_tasks:
-        box = FancyBboxPatch((x - 1.3, y - 0.6), 2.6, 1.2, boxstyle="round,pad=0.15",
-                             facecolor=color, alpha=0.2, edgecolor=color, linewidth=1.5)
-        ax.add_patch(box)
-        ax.text(x, y, label, ha='center', va='center', fontsize=8, fontweight='bold', color=color)
+    draw_task_boxes(ax, gk_tasks)
 
     ax.annotate('', xy=(1.5, 6.6), xytext=(5, 6.6),
                 arrowprops=dict(arrowstyle='<->', color=STRIKER_RED, lw=2))
     ax.text(3.25, 6.1, 'Shared: Horizontal Axis', ha='center', fontsize=7, color=STRIKER_RED, style='italic')
 
     # Sensory subspaces
-    ax.text(5, 4.5, 'Sensory (Anticipation Cues)', ha='center', fontsize=9, fontweight='bold')
+    ax.text(5, 4.5, 'Sensory (Anticipation Cues)', ha='center', fontproperties=FP_TITLE)
     ax.text(2.5, 3.7, 'Hip Kinematics', ha='center', fontsize=8, color=KEEPER_BLUE,
             bbox=dict(boxstyle='round', facecolor=KEEPER_BLUE, alpha=0.15))
     ax.text(7.5, 3.7, 'Gaze Direction', ha='center', fontsize=8, color=MUTED,
@@ -134,22 +198,20 @@ def fig1_task_mapping():
             color=MUTED, style='italic')
 
     # Motor subspaces
-    ax.text(5, 1.8, 'Motor Subspaces', ha='center', fontsize=9, fontweight='bold')
+    ax.text(5, 1.8, 'Motor Subspaces', ha='center', fontproperties=FP_TITLE)
     ax.text(3, 1.2, 'Horizontal Dive\n(Left/Right)', ha='center', fontsize=8, color=STRIKER_RED,
             bbox=dict(boxstyle='round', facecolor=STRIKER_RED, alpha=0.15))
     ax.text(7.5, 1.2, 'Vertical\n(Stay/Collapse)', ha='center', fontsize=8, color=PURPLE,
             bbox=dict(boxstyle='round', facecolor=PURPLE, alpha=0.15))
 
-    plt.tight_layout()
-    plt.savefig(os.path.join(FIG_DIR, 'fig1_task_mapping.pdf'), dpi=300, bbox_inches='tight')
-    plt.savefig(os.path.join(FIG_DIR, 'fig1_task_mapping.png'), dpi=200, bbox_inches='tight')
-    plt.close()
+    fig.tight_layout()
+    save_figure(fig, 'fig1_task_mapping', formats)
     print("Generated: fig1_task_mapping")
 
 
-def fig2_interference_predictions():
+def fig2_interference_predictions(formats=FORMATS):
     """Figure 2: Within-axis vs cross-axis interference predictions."""
-    fig, axes = plt.subplots(1, 3, figsize=(12, 4))
+    fig, axes = new_figure(1, 3, figsize=(12, 4))
 
     # Panel A: Within vs cross axis recovery time
     ax = axes[0]
@@ -183,48 +245,71 @@ def fig2_interference_predictions():
 
     # Panel C: Shot quality vs keeper commitment timing
     ax = axes[2]
-    commit_time = np.linspace(-400, 0, 50)  # ms before ball strike (negative = early)
+    commit_time = np.linspace(-400, 0, 50, dtype=np.float32)  # ms before ball strike (negative = early)
     # Power + placement combined quality
-    np.random.seed(42)
-    shot_quality = 0.85 - 0.25 * np.exp(-((commit_time + 100) ** 2) / (2 * 80 ** 2)) + np.random.normal(0, 0.03, 50)
+    rng = np.random.default_rng(SEED)
+    noise = rng.standard_normal(50, dtype=np.float32) * np.float32(0.03)
+    shot_quality = 0.85 - 0.25 * np.exp(-((commit_time + 100) ** 2) / (2 * 80 ** 2)) + noise
     shot_quality = np.clip(shot_quality, 0.3, 1.0)
 
-    ax.scatter(commit_time, shot_quality, c=commit_time, cmap='RdYlGn', s=30, alpha=0.7, edgecolors='white', linewidth=0.5)
-    ax.plot(commit_time, np.convolve(shot_quality, np.ones(8)/8, mode='same'), color=FIELD_GREEN, lw=2)
+    # Running mean of width 8 via a cumulative sum; reflecting the ends keeps
+    # the length at 50 without the zero-padding droop at the edges
+    width = 8
+    padded = np.pad(shot_quality, (width // 2, width - 1 - width // 2), mode='reflect')
+    csum = np.cumsum(np.insert(padded, 0, 0))
+    smoothed = (csum[width:] - csum[:-width]) / width
+
+    # Colour by commitment time in a few bands; each band is one marker-only
+    # Line2D, which is much lighter to draw than a per-point PathCollection
+    n_bands = 4
+    band_colors = matplotlib.colormaps['RdYlGn']((np.arange(n_bands) + 0.5) / n_bands)
+    for t, q, color in zip(np.array_split(commit_time, n_bands), np.array_split(shot_quality, n_bands), band_colors):
+        ax.plot(t, q, linestyle='', marker='o', markersize=np.sqrt(30), markerfacecolor=color,
+                markeredgecolor='white', markeredgewidth=0.5, alpha=0.7)
+    ax.plot(commit_time, smoothed, color=FIELD_GREEN, lw=2)
     ax.set_xlabel('Keeper Commitment Time\n(ms before ball strike)', fontweight='bold')
     ax.set_ylabel('Shot Quality Index', fontweight='bold')
     ax.set_title('C. Predicted: Late Keeper\nDegrades Shot Quality', fontweight='bold')
     ax.axvline(x=-150, color=WARN_ORANGE, linestyle='--', alpha=0.7, label='Typical commit')
     ax.legend(fontsize=7, loc='lower left')
 
-    plt.tight_layout()
-    plt.savefig(os.path.join(FIG_DIR, 'fig2_predictions.pdf'), dpi=300, bbox_inches='tight')
-    plt.savefig(os.path.join(FIG_DIR, 'fig2_predictions.png'), dpi=200, bbox_inches='tight')
-    plt.close()
+    fig.tight_layout()
+    save_figure(fig, 'fig2_predictions', formats)
     print("Generated: fig2_predictions")
 
 
-def fig3_transformation_window():
+def _pw_exp(t, onset, tau_rise, decay_start=np.inf, tau_decay=1.0, amp=1.0):
+    """Activation that is zero until ``onset``, rises exponentially with time
+    constant ``tau_rise``, and decays with ``tau_decay`` after ``decay_start``."""
+    rise = 1 - np.exp(-np.maximum(0, t - onset) / tau_rise)
+    return amp * rise * np.exp(-np.maximum(0, t - decay_start) / tau_decay)
+
+
+def fig3_transformation_window(formats=FORMATS):
     """Figure 3: The sensory-motor transformation window."""
-    fig, axes = plt.subplots(1, 2, figsize=(10, 4.5))
+    fig, axes = new_figure(1, 2, figsize=(10, 4.5))
 
     # Panel A: Sensory and motor subspace activation over time
     ax = axes[0]
-    time = np.linspace(-200, 500, 300)
+    time = np.linspace(-200, 500, 300, dtype=np.float32)
     stim_onset = 0  # ball strike
 
+    # One float32 buffer, refilled with fresh noise for each curve
+    rng = np.random.default_rng(SEED)
+    noise = np.empty_like(time)
+
+    def fresh_noise(scale=0.02):
+        rng.standard_normal(dtype=np.float32, out=noise)
+        return np.multiply(noise, np.float32(scale), out=noise)
+
     # Sensory categorisation
-    sensory = np.zeros_like(time)
-    mask = time > 60
-    sensory[mask] = 0.9 * (1 - np.exp(-(time[mask] - 60) / 25)) * np.exp(-np.maximum(0, time[mask] - 300) / 500)
-    sensory += np.random.normal(0, 0.02, len(time))
+    sensory = _pw_exp(time, 60, 25, decay_start=300, tau_decay=500, amp=0.9)
+    sensory += fresh_noise()
     sensory = np.clip(sensory, 0, 1)
 
     # Motor commitment
-    motor = np.zeros_like(time)
-    mask2 = time > 123
-    motor[mask2] = 0.95 * (1 - np.exp(-(time[mask2] - 123) / 30))
-    motor += np.random.normal(0, 0.02, len(time))
+    motor = _pw_exp(time, 123, 30, amp=0.95)
+    motor += fresh_noise()
     motor = np.clip(motor, 0, 1)
 
     ax.plot(time, sensory, color=KEEPER_BLUE, lw=2.5, label='Sensory Categorisation\n("Going right")')
@@ -244,24 +329,20 @@ def fig3_transformation_window():
 
     # Panel B: Stutter-step exploitation
     ax = axes[1]
-    time2 = np.linspace(-200, 500, 300)
+    time2 = np.linspace(-200, 500, 300, dtype=np.float32)
 
     # With stutter step: sensory loads "right" then switches to "left"
-    sensory_fake = np.zeros_like(time2)
-    mask_a = (time2 > 40) & (time2 < 150)
-    sensory_fake[mask_a] = 0.7 * (1 - np.exp(-(time2[mask_a] - 40) / 20))
-    mask_b = time2 >= 150
-    sensory_fake[mask_b] = sensory_fake[mask_a][-1] * np.exp(-(time2[mask_b] - 150) / 30) - \
-                           0.6 * (1 - np.exp(-(time2[mask_b] - 180) / 25))
-    sensory_fake += np.random.normal(0, 0.02, len(time2))
+    before = time2 < 150
+    rise = _pw_exp(time2, 40, 20, amp=0.7)
+    peak = rise[before][-1]
+    decay = peak * np.exp(-(time2 - 150) / 30) - 0.6 * (1 - np.exp(-(time2 - 180) / 25))
+    sensory_fake = np.where(before, rise, decay)
+    sensory_fake += fresh_noise()
 
     # Motor follows with delay (partially committed to wrong direction)
-    motor_confused = np.zeros_like(time2)
-    mask_c = time2 > 100
-    motor_confused[mask_c] = 0.4 * (1 - np.exp(-(time2[mask_c] - 100) / 35))
-    mask_d = time2 > 200
-    motor_confused[mask_d] = motor_confused[mask_c][-1] * np.exp(-(time2[mask_d] - 200) / 40)
-    motor_confused += np.random.normal(0, 0.02, len(time2))
+    load = _pw_exp(time2, 100, 35, amp=0.4)
+    motor_confused = np.where(time2 > 200, load[-1] * np.exp(-(time2 - 200) / 40), load)
+    motor_confused += fresh_noise()
 
     ax.plot(time2, sensory_fake, color=KEEPER_BLUE, lw=2.5, label='Sensory: initially "right"\nthen switches to "left"')
     ax.plot(time2, motor_confused, color=STRIKER_RED, lw=2.5, label='Motor: partially committed\nto "right" (stuck)')
@@ -279,16 +360,14 @@ def fig3_transformation_window():
     ax.legend(fontsize=7, loc='upper left')
     ax.set_xlim(-200, 500)
 
-    plt.tight_layout()
-    plt.savefig(os.path.join(FIG_DIR, 'fig3_transformation.pdf'), dpi=300, bbox_inches='tight')
-    plt.savefig(os.path.join(FIG_DIR, 'fig3_transformation.png'), dpi=200, bbox_inches='tight')
-    plt.close()
+    fig.tight_layout()
+    save_figure(fig, 'fig3_transformation', formats)
     print("Generated: fig3_transformation")
 
 
-def fig4_gain_modulation():
+def fig4_gain_modulation(formats=FORMATS):
     """Figure 4: Gain modulation and the expertise blind spot."""
-    fig, axes = plt.subplots(1, 2, figsize=(10, 4.5))
+    fig, axes = new_figure(1, 2, figsize=(10, 4.5))
 
     # Panel A: CPI by expertise
     ax = axes[0]
@@ -329,34 +408,31 @@ def fig4_gain_modulation():
                 fontsize=8, color=STRIKER_RED, fontweight='bold',
                 arrowprops=dict(arrowstyle='->', color=STRIKER_RED, lw=1.5))
 
-    plt.tight_layout()
-    plt.savefig(os.path.join(FIG_DIR, 'fig4_gain_modulation.pdf'), dpi=300, bbox_inches='tight')
-    plt.savefig(os.path.join(FIG_DIR, 'fig4_gain_modulation.png'), dpi=200, bbox_inches='tight')
-    plt.close()
+    fig.tight_layout()
+    save_figure(fig, 'fig4_gain_modulation', formats)
     print("Generated: fig4_gain_modulation")
 
 
-def fig5_precommit_advantage():
+def fig5_precommit_advantage(formats=FORMATS):
     """Figure 5: Pre-commitment as interference reduction."""
-    fig, ax = plt.subplots(1, 1, figsize=(7, 5))
+    fig, ax = new_figure(1, 1, figsize=(7, 5))
 
     # Simulate motor programme purity
-    np.random.seed(42)
+    rng = np.random.default_rng(SEED)
     n = 100
 
     # Pre-committed: single clean motor programme
-    precommit_x = np.random.normal(0.8, 0.08, n)
-    precommit_y = np.random.normal(0.85, 0.07, n)
+    precommit_x = rng.normal(0.8, 0.08, n)
+    precommit_y = rng.normal(0.85, 0.07, n)
 
     # Reactive: contaminated by competing programme
-    reactive_x = np.random.normal(0.55, 0.18, n)
-    reactive_y = np.random.normal(0.60, 0.16, n)
+    reactive_x = rng.normal(0.55, 0.18, n)
+    reactive_y = rng.normal(0.60, 0.16, n)
 
     ax.scatter(reactive_x, reactive_y, c=STRIKER_RED, alpha=0.4, s=25, label='Reactive (reads keeper)')
     ax.scatter(precommit_x, precommit_y, c=FIELD_GREEN, alpha=0.4, s=25, label='Pre-committed')
 
     # Ellipses for spread
-    from matplotlib.patches import Ellipse
     ell1 = Ellipse((0.55, 0.60), 0.36, 0.32, angle=0, facecolor=STRIKER_RED, alpha=0.1, edgecolor=STRIKER_RED, lw=2)
     ell2 = Ellipse((0.8, 0.85), 0.16, 0.14, angle=0, facecolor=FIELD_GREEN, alpha=0.1, edgecolor=FIELD_GREEN, lw=2)
     ax.add_patch(ell1)
@@ -377,13 +453,54 @@ def fig5_precommit_advantage():
                 fontsize=9, color=STRIKER_RED, fontweight='bold',
                 arrowprops=dict(arrowstyle='->', color=STRIKER_RED, lw=1.5))
 
-    plt.tight_layout()
-    plt.savefig(os.path.join(FIG_DIR, 'fig5_precommit.pdf'), dpi=300, bbox_inches='tight')
-    plt.savefig(os.path.join(FIG_DIR, 'fig5_precommit.png'), dpi=200, bbox_inches='tight')
-    plt.close()
+    fig.tight_layout()
+    save_figure(fig, 'fig5_precommit', formats)
     print("Generated: fig5_precommit")
 
 
+IMAGEN_PARAMETERS = {
+    "sampleCount": 1,
+    "aspectRatio": "16:9",
+    "safetyFilterLevel": "BLOCK_ONLY_HIGH"
+}
+
+# Generated images are kept here, keyed by prompt and parameters, so unchanged
+# prompts are not re-billed on every run
+IMAGEN_CACHE_DIR = os.path.join(FIG_DIR, '.imagen_cache')
+
+
+def _cache_path(item):
+    """Cache file for a prompt, keyed by SHA-256 of the prompt and request parameters."""
+    key_src = json.dumps({"prompt": item["prompt"], "parameters": IMAGEN_PARAMETERS}, sort_keys=True)
+    key = hashlib.sha256(key_src.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(IMAGEN_CACHE_DIR, f'{key}.png')
+
+
+def _generate_one(session, endpoint, item):
+    """Request one Imagen prompt; return its prediction, or None if nothing came back."""
+    payload = {"instances": [{"prompt": item["prompt"]}], "parameters": IMAGEN_PARAMETERS}
+    response = session.post(endpoint, json=payload, timeout=60)
+    if response.status_code != 200:
+        raise RuntimeError(f"API error ({response.status_code}): {response.text[:200]}")
+    predictions = response.json().get('predictions', [])
+    return predictions[0] if predictions else None
+
+
+def _save_result(prediction, item):
+    """Decode an Imagen prediction and save it to FIG_DIR under the prompt's filename."""
+    from PIL import Image
+
+    if prediction is None:
+        print(f"  No image returned for {item['filename']}")
+        return
+    img = Image.open(BytesIO(base64.b64decode(prediction['bytesBase64Encoded'])))
+    cached = _cache_path(item)
+    img.save(cached)
+    filepath = os.path.join(FIG_DIR, item['filename'])
+    shutil.copyfile(cached, filepath)
+    print(f"  Saved: {filepath}")
+
+
 def try_imagen_generation():
     """
     Attempt to generate photorealistic images using Google's Imagen API.
@@ -394,14 +511,14 @@ def try_imagen_generation():
     if not api_key:
         print("\nNote: GOOGLE_API_KEY not set. Skipping Imagen photorealistic generation.")
         print("To generate photorealistic images, set: export GOOGLE_API_KEY=your_key")
-        print("Then re-run this script.\n")
+        print("Then re-run this script with --imagen.\n")
         return
 
     try:
         import requests
-        import base64
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
         from PIL import Image
-        from io import BytesIO
     except ImportError:
         print("Note: requests and/or Pillow not installed. Skipping Imagen generation.")
         return
@@ -451,54 +568,109 @@ def try_imagen_generation():
         }
     ]
 
+    # Reuse cached images for prompts that have not changed since the last run
+    os.makedirs(IMAGEN_CACHE_DIR, exist_ok=True)
+    pending = []
+    for item in prompts:
+        cached = _cache_path(item)
+        if os.path.exists(cached):
+            shutil.copyfile(cached, os.path.join(FIG_DIR, item['filename']))
+            print(f"Cached: {item['filename']}")
+        else:
+            pending.append(item)
+    if not pending:
+        return
+
     endpoint = f"https://generativelanguage.googleapis.com/v1beta/models/imagen-3.0-generate-002:predict?key={api_key}"
 
-    for item in prompts:
-        print(f"Generating: {item['filename']}...")
-        try:
-            payload = {
-                "instances": [{"prompt": item["prompt"]}],
-                "parameters": {
-                    "sampleCount": 1,
-                    "aspectRatio": "16:9",
-                    "safetyFilterLevel": "BLOCK_ONLY_HIGH"
-                }
-            }
-            response = requests.post(endpoint, json=payload, timeout=60)
-
-            if response.status_code == 200:
-                result = response.json()
-                if 'predictions' in result and len(result['predictions']) > 0:
-                    img_bytes = base64.b64decode(result['predictions'][0]['bytesBase64Encoded'])
-                    img = Image.open(BytesIO(img_bytes))
-                    filepath = os.path.join(FIG_DIR, item['filename'])
-                    img.save(filepath)
-                    print(f"  Saved: {filepath}")
-                else:
-                    print(f"  No image returned for {item['filename']}")
-            else:
-                print(f"  API error ({response.status_code}): {response.text[:200]}")
-        except Exception as e:
-            print(f"  Error generating {item['filename']}: {e}")
+    # One pooled session shared by the concurrent requests, with backoff on
+    # rate limiting and transient server errors
+    retry = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504],
+                  allowed_methods=frozenset({'POST'}), raise_on_status=False)
+    session = requests.Session()
+    session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=retry))
+    session.headers['Content-Type'] = 'application/json'
+
+    # One request per prompt so each image maps to its filename even when
+    # others are safety-filtered; they are independent and network-bound, so
+    # issue them concurrently
+    with ThreadPoolExecutor(max_workers=len(pending)) as ex:
+        futures = {}
+        for item in pending:
+            print(f"Generating: {item['filename']}...")
+            futures[ex.submit(_generate_one, session, endpoint, item)] = item
+        for fut in as_completed(futures):
+            item = futures[fut]
+            try:
+                _save_result(fut.result(), item)
+            except Exception as e:
+                print(f"  Error generating {item['filename']}: {e}")
+
+
+FIGURE_FUNCS = {
+    1: fig1_task_mapping,
+    2: fig2_interference_predictions,
+    3: fig3_transformation_window,
+    4: fig4_gain_modulation,
+    5: fig5_precommit_advantage,
+}
+
+
+def _parse_figures(value):
+    """Parse ``--figures``: 'all' or a comma-separated list of figure numbers."""
+    if value == 'all':
+        return set(FIGURE_FUNCS)
+    try:
+        selected = {int(part) for part in value.split(',') if part.strip()}
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected 'all' or numbers like 1,3,5, got {value!r}")
+    unknown = selected - set(FIGURE_FUNCS)
+    if not selected or unknown:
+        raise argparse.ArgumentTypeError(
+            f"figures must be chosen from {sorted(FIGURE_FUNCS)}, got {value!r}")
+    return selected
+
+
+def _call(func, formats):
+    """Run one figure function (module-level so worker processes can pickle it)."""
+    return func(formats=formats)
 
 
 # ============================================================
 # Main
 # ============================================================
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    only = parser.add_mutually_exclusive_group()
+    only.add_argument('--png-only', action='store_const', dest='formats', const=('png',),
+                      help='write the PNGs only, skipping the PDF backend')
+    only.add_argument('--pdf-only', action='store_const', dest='formats', const=('pdf',),
+                      help='write the archival PDFs only')
+    only.add_argument('--preview', action='store_const', dest='formats', const=('preview',),
+                      help='write 100 dpi *_preview.png files only, for quick checks')
+    parser.set_defaults(formats=FORMATS)
+    parser.add_argument('--figures', type=_parse_figures, default='all',
+                        help="figures to build: 'all' (default) or e.g. 1,3,5")
+    parser.add_argument('--imagen', action='store_true',
+                        help='also generate the photorealistic images via the Imagen API')
+    args = parser.parse_args()
+    funcs = [FIGURE_FUNCS[i] for i in sorted(args.figures)]
+
     print("Generating figures for: The Subspace Penalty Kick")
     print("=" * 50)
 
-    fig1_task_mapping()
-    fig2_interference_predictions()
-    fig3_transformation_window()
-    fig4_gain_modulation()
-    fig5_precommit_advantage()
+    # Each figure builds its own Figure and writes distinct files, so they
+    # render independently in separate processes.
+    with ProcessPoolExecutor(max_workers=len(funcs)) as ex:
+        list(ex.map(_call, funcs, [args.formats] * len(funcs)))
 
     print("\nAll matplotlib figures generated in:", FIG_DIR)
     print()
 
-    # Attempt photorealistic generation
-    try_imagen_generation()
+    # Photorealistic generation hits a billable API, so it is opt-in
+    if args.imagen:
+        try_imagen_generation()
+    else:
+        print("Skipping Imagen generation (pass --imagen to enable).")
 
     print("\nDone. Run compile.sh to build the PDF.")